@@ -0,0 +1,93 @@
+# backend/archive.py
+from datetime import date, datetime, timedelta
+import os
+from dotenv import load_dotenv
+from sqlalchemy import select, insert, delete, exists
+
+from backend.database import SessionLocal
+from backend import models
+
+load_dotenv()
+
+# rows older than this many days are moved to the *_archive tables
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "180"))
+# rows moved per transaction, and max transactions per table per run
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+ARCHIVE_MAX_BATCHES = int(os.getenv("ARCHIVE_MAX_BATCHES", "20"))
+
+# columns copied hot -> cold (id lands in source_id; archived_at is filled by the table default)
+BILL_COLUMNS = ["id", "user_id", "title", "type", "amount", "due_date", "repeat_interval",
+                "reminder_days", "notes", "is_paid", "created_at"]
+PAYMENT_COLUMNS = ["id", "user_id", "bill_id", "amount", "method", "paid_on", "notes"]
+REMINDER_COLUMNS = ["id", "user_id", "bill_id", "reminder_sent_at", "channel"]
+
+
+def _move_batch(db, hot, cold, columns, condition, batch_size):
+    """Copy up to batch_size rows matching condition into cold, delete them from hot. Returns rows moved."""
+    ids = db.execute(
+        select(hot.id).where(condition).order_by(hot.id).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+    try:
+        src = select(*[getattr(hot, c) for c in columns]).where(hot.id.in_(ids))
+        targets = [cold.source_id if c == "id" else getattr(cold, c) for c in columns]
+        db.execute(insert(cold).from_select(targets, src))
+        db.execute(delete(hot).where(hot.id.in_(ids)))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(ids)
+
+
+def _move_all(db, hot, cold, columns, condition, batch_size, max_batches):
+    moved = 0
+    for _ in range(max_batches):
+        n = _move_batch(db, hot, cold, columns, condition, batch_size)
+        moved += n
+        if n < batch_size:
+            break
+    return moved
+
+
+def archive_old_rows(db, cutoff: date, batch_size: int = ARCHIVE_BATCH_SIZE, max_batches: int = ARCHIVE_MAX_BATCHES):
+    """
+    Move settled history older than cutoff into the archive tables.
+    Payments and reminder logs go first; a paid bill is only archived once no
+    hot payment or reminder log still points at it (so nothing gets SET NULL).
+    """
+    cutoff_ts = datetime.combine(cutoff, datetime.min.time())
+
+    payments = _move_all(
+        db, models.Payment, models.PaymentArchive, PAYMENT_COLUMNS,
+        models.Payment.paid_on < cutoff_ts,
+        batch_size, max_batches,
+    )
+    reminders = _move_all(
+        db, models.ReminderLog, models.ReminderLogArchive, REMINDER_COLUMNS,
+        models.ReminderLog.reminder_sent_at < cutoff_ts,
+        batch_size, max_batches,
+    )
+    bills = _move_all(
+        db, models.Bill, models.BillArchive, BILL_COLUMNS,
+        (models.Bill.is_paid == True)
+        & (models.Bill.due_date < cutoff)
+        & ~exists().where(models.Payment.bill_id == models.Bill.id)
+        & ~exists().where(models.ReminderLog.bill_id == models.Bill.id),
+        batch_size, max_batches,
+    )
+    return {"bills": bills, "payments": payments, "reminders": reminders}
+
+
+def run_archive_job():
+    db = SessionLocal()
+    try:
+        cutoff = date.today() - timedelta(days=ARCHIVE_AFTER_DAYS)
+        counts = archive_old_rows(db, cutoff)
+        if any(counts.values()):
+            print(f"[archive] moved {counts} (cutoff {cutoff})")
+    except Exception as e:
+        print("[archive] error:", e)
+    finally:
+        db.close()
@@ -8,7 +8,7 @@ from sqlalchemy.orm import Session
 import os
 from dotenv import load_dotenv
 from backend import crud, schemas
-from backend.database import SessionLocal
+from backend.database import get_db, get_read_db
 
 load_dotenv()
 
@@ -39,13 +39,6 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 def authenticate_user(db: Session, email: str, password: str):
     user = crud.get_user_by_email(db, email=email)
     if not user:
@@ -54,16 +47,28 @@ def authenticate_user(db: Session, email: str, password: str):
         return None
     return user
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(status_code=401, detail="Could not validate credentials")
+def user_id_from_token(token: str) -> int | None:
+    """Verify the JWT and return its user id, or None if it is invalid."""
     try:
         payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        user_id: int = int(payload.get("sub"))
-        if user_id is None:
-            raise credentials_exception
-    except (JWTError, ValueError):
+        return int(payload.get("sub"))
+    except (JWTError, ValueError, TypeError):
+        return None
+
+def _user_for_token(token: str, db: Session):
+    credentials_exception = HTTPException(status_code=401, detail="Could not validate credentials")
+    user_id = user_id_from_token(token)
+    if user_id is None:
         raise credentials_exception
     user = crud.get_user(db, user_id)
     if user is None:
         raise credentials_exception
     return user
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)):
+    """For read-only routes: looks the user up on the read session."""
+    return _user_for_token(token, db)
+
+def get_current_user_rw(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """For write routes: reuses the route's primary session instead of holding a second connection."""
+    return _user_for_token(token, db)
@@ -5,7 +5,7 @@ from datetime import date, timedelta
 import calendar
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select, union_all, literal
 
 from backend import models, schemas
 
@@ -48,11 +48,16 @@ def create_bill(db: Session, user_id: int, bill_in: schemas.BillCreate):
     db.refresh(bill)
     return bill
 
-def get_bills_for_user(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[models.Bill]:
+def get_bills_for_user(db: Session, user_id: int, skip: int = 0, limit: int = 100, include_archived: bool = False) -> List[models.Bill]:
+    if include_archived:
+        return _union_with_archive(
+            db, models.Bill, models.BillArchive, BILL_FIELDS, user_id,
+            order_by="due_date", descending=False, skip=skip, limit=limit,
+        )
     return (
         db.query(models.Bill)
         .filter(models.Bill.user_id == user_id)
-        .order_by(models.Bill.due_date)
+        .order_by(models.Bill.due_date, models.Bill.id)
         .offset(skip)
         .limit(limit)
         .all()
@@ -170,17 +175,118 @@ def create_payment(db: Session, user_id: int, payment_in: dict):
     db.refresh(p)
     return p
 
-def get_payments_for_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
+def get_payments_for_user(db: Session, user_id: int, skip: int = 0, limit: int = 100, include_archived: bool = False):
+    if include_archived:
+        return _union_with_archive(
+            db, models.Payment, models.PaymentArchive, PAYMENT_FIELDS, user_id,
+            order_by="paid_on", descending=True, skip=skip, limit=limit,
+        )
     return (
         db.query(models.Payment)
         .filter(models.Payment.user_id == user_id)
-        .order_by(models.Payment.paid_on.desc())
+        .order_by(models.Payment.paid_on.desc(), models.Payment.id)
         .offset(skip)
         .limit(limit)
         .all()
     )
 
 
+def get_payments_between(db: Session, user_id: int, start, end, include_archived: bool = False):
+    """All payments with start <= paid_on < end, oldest first (used by the monthly export)."""
+    if include_archived:
+        stmt = _archive_union_stmt(
+            models.Payment, models.PaymentArchive, PAYMENT_FIELDS, user_id, "paid_on", False,
+            where=lambda t: [t.paid_on >= start, t.paid_on < end],
+        )
+        return db.execute(stmt).all()
+    return (
+        db.query(models.Payment)
+        .filter(
+            models.Payment.user_id == user_id,
+            models.Payment.paid_on >= start,
+            models.Payment.paid_on < end,
+        )
+        .order_by(models.Payment.paid_on, models.Payment.id)
+        .all()
+    )
+
+
+# -------------------------------
+# ARCHIVE READS (hot + cold)
+# -------------------------------
+
+BILL_FIELDS = ["id", "user_id", "title", "type", "amount", "due_date", "repeat_interval",
+               "reminder_days", "notes", "is_paid"]
+PAYMENT_FIELDS = ["id", "user_id", "bill_id", "amount", "method", "paid_on", "notes"]
+
+def _archive_union_stmt(hot, cold, fields, user_id: int, order_by: str, descending: bool, where=None):
+    """
+    UNION ALL of the hot table and its archive for one user. Rows carry an
+    extra `archived` flag and expose the same attributes as the ORM objects.
+    `where(table)` may return extra conditions, applied to both sides.
+    """
+    hot_q = select(*[getattr(hot, f) for f in fields], literal(False).label("archived")).where(hot.user_id == user_id)
+    cold_cols = [cold.source_id.label("id") if f == "id" else getattr(cold, f) for f in fields]
+    cold_q = select(*cold_cols, literal(True).label("archived")).where(cold.user_id == user_id)
+    if where is not None:
+        hot_q = hot_q.where(*where(hot))
+        cold_q = cold_q.where(*where(cold))
+    u = union_all(hot_q, cold_q).subquery()
+    col = u.c[order_by]
+    # active rows first: archived ones are the oldest and would otherwise fill the first page
+    return select(u).order_by(u.c.archived, col.desc() if descending else col, u.c.id)
+
+def _union_with_archive(db: Session, hot, cold, fields, user_id: int, order_by: str,
+                        descending: bool, skip: int, limit: int):
+    stmt = _archive_union_stmt(hot, cold, fields, user_id, order_by, descending)
+    return db.execute(stmt.offset(skip).limit(limit)).all()
+
+
+# -------------------------------
+# STREAMING READS (NDJSON)
+# -------------------------------
+
+STREAM_BATCH_SIZE = 500
+
+# Same rows and order as get_*_for_user for the same skip/limit; only the delivery differs.
+
+def iter_bills_for_user(db: Session, user_id: int, skip: int = 0, limit: int = 100, include_archived: bool = False):
+    """Yield one page of the user's bills straight from the cursor, STREAM_BATCH_SIZE rows at a time."""
+    if include_archived:
+        stmt = _archive_union_stmt(models.Bill, models.BillArchive, BILL_FIELDS, user_id, "due_date", False)
+        stmt = stmt.offset(skip).limit(limit)
+        result = db.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    else:
+        stmt = (
+            select(models.Bill)
+            .where(models.Bill.user_id == user_id)
+            .order_by(models.Bill.due_date, models.Bill.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        result = db.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE)).scalars()
+    for row in result:
+        yield row
+
+def iter_payments_for_user(db: Session, user_id: int, skip: int = 0, limit: int = 100, include_archived: bool = False):
+    """Yield one page of the user's payments, newest first, straight from the cursor."""
+    if include_archived:
+        stmt = _archive_union_stmt(models.Payment, models.PaymentArchive, PAYMENT_FIELDS, user_id, "paid_on", True)
+        stmt = stmt.offset(skip).limit(limit)
+        result = db.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    else:
+        stmt = (
+            select(models.Payment)
+            .where(models.Payment.user_id == user_id)
+            .order_by(models.Payment.paid_on.desc(), models.Payment.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        result = db.execute(stmt.execution_options(yield_per=STREAM_BATCH_SIZE)).scalars()
+    for row in result:
+        yield row
+
+
 # -------------------------------
 # DASHBOARD
 # -------------------------------
@@ -1,18 +1,179 @@
 # backend/database.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from fastapi import Request, Response
+import math
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
+# optional replica for read-only traffic; on SQLite we default to a read-only pool on the same file
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+# read-after-write consistency for read sessions:
+#   "strong"   - every read goes to the primary
+#   "session"  - a client that just wrote reads from the primary for READ_AFTER_WRITE_SECONDS.
+#                The marker travels in the WRITE_COOKIE cookie, so it holds across workers
+#                and instances as long as the client sends cookies back (same site, and
+#                withCredentials on cross-origin XHR). Clients that don't are covered by
+#                an in-process fallback, which only works with a single process.
+#   "eventual" - reads always go to the read pool
+READ_CONSISTENCY = os.getenv("READ_CONSISTENCY", "session")
+if READ_CONSISTENCY not in ("strong", "session", "eventual"):
+    raise ValueError(f"READ_CONSISTENCY must be strong, session or eventual, got {READ_CONSISTENCY!r}")
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
 
 engine = create_engine(DATABASE_URL, echo=False, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 Base = declarative_base()
 
+
+def _sqlite_path(url):
+    u = make_url(url)
+    if u.get_backend_name() != "sqlite" or not u.database or u.database == ":memory:":
+        return None
+    return u.database
+
+
+def _make_read_engine():
+    if READ_DATABASE_URL:
+        return create_engine(READ_DATABASE_URL, echo=False, future=True)
+    path = _sqlite_path(DATABASE_URL)
+    if path is None:
+        # no replica configured and not a file-backed SQLite db: share the primary
+        return engine
+    # a real file URL (not "sqlite://" + creator, which gets SingletonThreadPool)
+    # so connections are pooled and handed between FastAPI's worker threads safely
+    return create_engine(
+        f"sqlite:///file:{path}?mode=ro&uri=true",
+        poolclass=QueuePool,
+        connect_args={"check_same_thread": False},
+        echo=False,
+        future=True,
+    )
+
+
+if _sqlite_path(DATABASE_URL):
+    # WAL lets the read-only pool keep reading while a writer holds the lock
+    @event.listens_for(engine, "connect")
+    def _sqlite_wal(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.close()
+
+read_engine = _make_read_engine()
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
+
+
+# --- read-after-write tracking ---
+WRITE_COOKIE = "sd_last_write"
+# in-process fallback: user id -> time of that user's last commit on the primary
+_last_write = {}
+_last_write_lock = threading.Lock()
+
+
+def request_user_id(request: Request):
+    """User id from the request's bearer token, or None."""
+    # imported here: backend.auth imports this module
+    from backend.auth import user_id_from_token
+    auth = request.headers.get("authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return None
+    return user_id_from_token(auth[7:])
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _record_commit(session):
+    # record at commit time so the client's next read already sees it
+    record_write(session.info.get("user_id"))
+    response = session.info.get("response")
+    if response is not None:
+        set_write_cookie(response)
+
+
+def set_write_cookie(response: Response):
+    """Tell the client (whichever worker it reaches next) to read from the primary for a while."""
+    response.set_cookie(
+        WRITE_COOKIE,
+        f"{time.time():.3f}",
+        max_age=max(1, math.ceil(READ_AFTER_WRITE_SECONDS)),
+        httponly=True,
+        samesite="lax",
+    )
+
+
+def _cookie_recent(request: Request):
+    try:
+        ts = float(request.cookies.get(WRITE_COOKIE, ""))
+    except ValueError:
+        return False
+    return 0 <= time.time() - ts <= READ_AFTER_WRITE_SECONDS
+
+
+def record_write(user_id):
+    """Pin user_id's reads to the primary for READ_AFTER_WRITE_SECONDS."""
+    if user_id is None:
+        return
+    now = time.monotonic()
+    with _last_write_lock:
+        _last_write[user_id] = now
+        if len(_last_write) > 10000:
+            for k in [k for k, ts in _last_write.items() if now - ts > READ_AFTER_WRITE_SECONDS]:
+                del _last_write[k]
+
+
+def _recently_wrote(user_id):
+    if user_id is None:
+        return False
+    with _last_write_lock:
+        ts = _last_write.get(user_id)
+        if ts is None:
+            return False
+        if time.monotonic() - ts > READ_AFTER_WRITE_SECONDS:
+            del _last_write[user_id]
+            return False
+        return True
+
+
+def read_session_factory(request: Request):
+    """Pick the session factory a read-only request should use."""
+    if read_engine is engine or READ_CONSISTENCY == "strong":
+        return SessionLocal
+    if READ_CONSISTENCY == "session" and (
+        _cookie_recent(request) or _recently_wrote(request_user_id(request))
+    ):
+        return SessionLocal
+    return ReadSessionLocal
+
+
+# --- FastAPI dependencies ---
+
+def get_db(request: Request, response: Response):
+    """Read-write session on the primary."""
+    db = SessionLocal()
+    db.info["user_id"] = request_user_id(request)
+    db.info["response"] = response
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_read_db(request: Request):
+    """Session for read-only routes: the replica / read-only pool unless consistency says otherwise."""
+    db: Session = read_session_factory(request)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def init_db():
     # import models here to ensure they are registered with Base.metadata
     import backend.models as models
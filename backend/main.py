@@ -1,7 +1,10 @@
 # backend/main.py
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from backend import database, schemas, crud, auth
+from backend.ratelimit import RateLimitMiddleware
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
@@ -12,6 +15,9 @@ database.init_db()
 
 app = FastAPI(title="SmartDues - Starter API")
 
+# Registered first so it sits inside CORS: browsers can still read 429/503 + Retry-After.
+app.add_middleware(RateLimitMiddleware)
+
 origins = ["http://localhost:5173", "http://127.0.0.1:5173"]
 app.add_middleware(
     CORSMiddleware,
@@ -19,23 +25,75 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After"],
 )
 
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Compress responses above COMPRESS_MIN_BYTES. Brotli is used when the optional
+# brotli-asgi package is installed (it falls back to gzip for older clients).
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESS_MIN_BYTES, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+
+get_db = database.get_db            # primary, for writes
+get_read_db = database.get_read_db  # replica / read-only pool, for read-only routes
+
+NDJSON = "application/x-ndjson"
+
+def _accept_q(accept: str, media_type: str, exact_only: bool = False) -> float:
+    """q-value the Accept header gives media_type (most specific matching range wins)."""
+    main_type = media_type.split("/")[0]
+    best, best_rank = 0.0, -1
+    for part in accept.split(","):
+        params = [p.strip() for p in part.split(";")]
+        rng = params[0].lower()
+        if rng == media_type:
+            rank = 2
+        elif exact_only:
+            continue
+        elif rng == f"{main_type}/*":
+            rank = 1
+        elif rng == "*/*":
+            rank = 0
+        else:
+            continue
+        q = 1.0
+        for p in params[1:]:
+            if p.lower().startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        if rank > best_rank:
+            best, best_rank = q, rank
+    return best
+
+def wants_ndjson(request: Request) -> bool:
+    """NDJSON only when asked for by name (q > 0) and not ranked below plain JSON."""
+    accept = request.headers.get("accept", "")
+    ndjson_q = _accept_q(accept, NDJSON, exact_only=True)
+    return ndjson_q > 0 and ndjson_q >= _accept_q(accept, "application/json")
+
+# page size for list endpoints; the same skip/limit applies to JSON and NDJSON
+MAX_PAGE_SIZE = 1000
+
+def ndjson_response(request: Request, iter_rows, schema, user_id: int, skip: int, limit: int, include_archived: bool):
+    """
+    Stream rows as newline-delimited JSON. The generator owns its (read) session
+    so it stays open for as long as the response is being sent.
+    """
+    session_factory = database.read_session_factory(request)
+    def gen():
+        db = session_factory()
+        try:
+            for row in iter_rows(db, user_id, skip=skip, limit=limit, include_archived=include_archived):
+                yield schema.model_validate(row, from_attributes=True).model_dump_json() + "\n"
+        finally:
+            db.close()
+    return StreamingResponse(gen(), media_type=NDJSON)
 
 # --- Auth routes ---
 @app.post("/auth/signup", response_model=schemas.UserOut)
@@ -45,37 +103,45 @@ def signup(payload: schemas.UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Email already registered")
     hashed = auth.get_password_hash(payload.password)
     user = crud.create_user(db, email=payload.email, password_hash=hashed, phone=payload.phone)
+    # the new user isn't on a lagging replica yet: keep their first lookups on the primary
+    database.record_write(user.id)
     return user
 
 @app.post("/auth/login", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+def login(response: Response, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = auth.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
+    # login doesn't commit; pin explicitly in case the replica hasn't seen the signup yet
+    database.record_write(user.id)
+    database.set_write_cookie(response)
     access_token_expires = timedelta(minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60")))
     access_token = auth.create_access_token(data={"sub": str(user.id)}, expires_delta=access_token_expires)
     return {"access_token": access_token, "token_type": "bearer"}
 
 # --- Bills routes ---
 @app.post("/bills", response_model=schemas.BillOut)
-def create_bill_route(bill_in: schemas.BillCreate, db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
+def create_bill_route(bill_in: schemas.BillCreate, db: Session = Depends(get_db), user=Depends(auth.get_current_user_rw)):
     bill = crud.create_bill(db, user.id, bill_in)
     return bill
 
 @app.get("/bills", response_model=list[schemas.BillOut])
-def list_bills(db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
-    bills = crud.get_bills_for_user(db, user.id)
+def list_bills(request: Request, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+               include_archived: bool = False, db: Session = Depends(get_read_db), user=Depends(auth.get_current_user)):
+    if wants_ndjson(request):
+        return ndjson_response(request, crud.iter_bills_for_user, schemas.BillOut, user.id, skip, limit, include_archived)
+    bills = crud.get_bills_for_user(db, user.id, skip, limit, include_archived=include_archived)
     return bills
 
 @app.get("/bills/{bill_id}", response_model=schemas.BillOut)
-def get_bill(bill_id: int, db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
+def get_bill(bill_id: int, db: Session = Depends(get_read_db), user=Depends(auth.get_current_user)):
     bill = crud.get_bill(db, bill_id)
     if not bill or bill.user_id != user.id:
         raise HTTPException(status_code=404, detail="Bill not found")
     return bill
 
 @app.put("/bills/{bill_id}", response_model=schemas.BillOut)
-def update_bill(bill_id: int, bill_update: schemas.BillUpdate, db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
+def update_bill(bill_id: int, bill_update: schemas.BillUpdate, db: Session = Depends(get_db), user=Depends(auth.get_current_user_rw)):
     bill = crud.get_bill(db, bill_id)
     if not bill or bill.user_id != user.id:
         raise HTTPException(status_code=404, detail="Bill not found")
@@ -85,7 +151,7 @@ def update_bill(bill_id: int, bill_update: schemas.BillUpdate, db: Session = Dep
 from fastapi import status
 
 @app.post("/bills/{bill_id}/mark_paid", response_model=schemas.BillOut, status_code=status.HTTP_200_OK)
-def mark_paid_route(bill_id: int, db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
+def mark_paid_route(bill_id: int, db: Session = Depends(get_db), user=Depends(auth.get_current_user_rw)):
     bill = crud.mark_bill_paid(db, bill_id, user.id)
     if not bill:
         raise HTTPException(status_code=404, detail="Bill not found or not yours")
@@ -93,7 +159,7 @@ def mark_paid_route(bill_id: int, db: Session = Depends(get_db), user=Depends(au
 
 
 @app.delete("/bills/{bill_id}")
-def delete_bill(bill_id: int, db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
+def delete_bill(bill_id: int, db: Session = Depends(get_db), user=Depends(auth.get_current_user_rw)):
     bill = crud.get_bill(db, bill_id)
     if not bill or bill.user_id != user.id:
         raise HTTPException(status_code=404, detail="Bill not found")
@@ -102,18 +168,21 @@ def delete_bill(bill_id: int, db: Session = Depends(get_db), user=Depends(auth.g
 
 
 @app.get("/dashboard")
-def dashboard(db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
+def dashboard(db: Session = Depends(get_read_db), user=Depends(auth.get_current_user)):
     data = crud.get_dashboard(db, user.id)
     return data
 
 @app.post("/payments", response_model=schemas.PaymentOut)
-def create_payment_route(payload: schemas.PaymentCreate, db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
+def create_payment_route(payload: schemas.PaymentCreate, db: Session = Depends(get_db), user=Depends(auth.get_current_user_rw)):
     p = crud.create_payment(db, user.id, payload.dict())
     return p
 
 @app.get("/payments", response_model=list[schemas.PaymentOut])
-def list_payments_route(db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
-    items = crud.get_payments_for_user(db, user.id)
+def list_payments_route(request: Request, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+                        include_archived: bool = False, db: Session = Depends(get_read_db), user=Depends(auth.get_current_user)):
+    if wants_ndjson(request):
+        return ndjson_response(request, crud.iter_payments_for_user, schemas.PaymentOut, user.id, skip, limit, include_archived)
+    items = crud.get_payments_for_user(db, user.id, skip, limit, include_archived=include_archived)
     return items
 
 # in backend/main.py
@@ -122,28 +191,20 @@ from backend.scheduler import start_scheduler
 # after app = FastAPI(...)
 start_scheduler()
 
-from fastapi.responses import StreamingResponse
 import csv
 from io import StringIO
 from datetime import datetime
 
 @app.get("/payments/export")
-def export_payments(month: str, db: Session = Depends(get_db), user=Depends(auth.get_current_user)):
+def export_payments(month: str, include_archived: bool = False, db: Session = Depends(get_read_db), user=Depends(auth.get_current_user)):
     # month format YYYY-MM
     start = datetime.fromisoformat(month + "-01")
     if start.month == 12:
         end = start.replace(year=start.year+1, month=1)
     else:
         end = start.replace(month=start.month+1)
-    payments = crud.get_payments_for_user(db, user.id, 0, 1000)
-    # filter by month
-    rows = []
-    for p in payments:
-        paid_on = p.paid_on
-        if not paid_on:
-            continue
-        if paid_on >= start and paid_on < end:
-            rows.append([p.id, p.bill_id, float(p.amount), p.method, paid_on.isoformat()])
+    payments = crud.get_payments_between(db, user.id, start, end, include_archived=include_archived)
+    rows = [[p.id, p.bill_id, float(p.amount), p.method, p.paid_on.isoformat()] for p in payments]
     buf = StringIO()
     writer = csv.writer(buf)
     writer.writerow(["id","bill_id","amount","method","paid_on"])
@@ -16,6 +16,7 @@ class User(Base):
 
 class Bill(Base):
     __tablename__ = "bills"
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse ids of archived rows
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(255), nullable=False)
@@ -36,6 +37,7 @@ from sqlalchemy.sql import func
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse ids of archived rows
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     bill_id = Column(Integer, ForeignKey("bills.id", ondelete="SET NULL"), nullable=True)
@@ -46,8 +48,54 @@ class Payment(Base):
 
 class ReminderLog(Base):
     __tablename__ = "reminders_log"
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse ids of archived rows
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     bill_id = Column(Integer, ForeignKey("bills.id", ondelete="SET NULL"))
     reminder_sent_at = Column(TIMESTAMP, nullable=True)
     channel = Column(String(20), nullable=True)
+
+
+# --- archive (cold) tables ---
+# Same columns as the hot tables plus archived_at. The hot row's id is kept in
+# source_id; archive_id is the archive's own key, so an id reused by SQLite in a
+# pre-AUTOINCREMENT hot table can't collide. No FKs to bills since the
+# referenced bill may be archived too.
+
+class BillArchive(Base):
+    __tablename__ = "bills_archive"
+    archive_id = Column(Integer, primary_key=True)
+    source_id = Column(Integer, index=True, nullable=False)
+    user_id = Column(Integer, index=True, nullable=False)
+    title = Column(String(255), nullable=False)
+    type = Column(String(50), default="emi")
+    amount = Column(Numeric(12,2), nullable=False)
+    due_date = Column(Date, nullable=False)
+    repeat_interval = Column(String(20), nullable=True)
+    reminder_days = Column(String(100), nullable=True)
+    notes = Column(Text, nullable=True)
+    is_paid = Column(Boolean, default=True)
+    created_at = Column(TIMESTAMP, nullable=True)
+    archived_at = Column(TIMESTAMP, server_default=func.now())
+
+class PaymentArchive(Base):
+    __tablename__ = "payments_archive"
+    archive_id = Column(Integer, primary_key=True)
+    source_id = Column(Integer, index=True, nullable=False)
+    user_id = Column(Integer, index=True, nullable=False)
+    bill_id = Column(Integer, nullable=True)
+    amount = Column(Numeric(12,2), nullable=False)
+    method = Column(String(50), nullable=True)
+    paid_on = Column(TIMESTAMP, nullable=True)
+    notes = Column(Text, nullable=True)
+    archived_at = Column(TIMESTAMP, server_default=func.now())
+
+class ReminderLogArchive(Base):
+    __tablename__ = "reminders_log_archive"
+    archive_id = Column(Integer, primary_key=True)
+    source_id = Column(Integer, index=True, nullable=False)
+    user_id = Column(Integer, index=True)
+    bill_id = Column(Integer)
+    reminder_sent_at = Column(TIMESTAMP, nullable=True)
+    channel = Column(String(20), nullable=True)
+    archived_at = Column(TIMESTAMP, server_default=func.now())
@@ -0,0 +1,169 @@
+# backend/ratelimit.py
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import json
+import math
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+from backend.auth import user_id_from_token
+
+load_dotenv()
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+# every client (user id, or IP when anonymous) gets one bucket shared by all routes
+RATE_LIMIT_USER_PER_MINUTE = float(os.getenv("RATE_LIMIT_USER_PER_MINUTE", "120"))
+RATE_LIMIT_USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "60"))
+# extra per-user buckets for costly routes: path -> (requests per minute, burst)
+ROUTE_LIMITS = {
+    "/dashboard": (30, 10),
+    "/payments/export": (6, 3),
+}
+# at most this many expensive requests run at once across all users; the rest get 503.
+# each user may hold only a share of those slots so one client can't take them all.
+EXPENSIVE_ROUTES = {"/dashboard", "/payments/export"}
+MAX_CONCURRENT_EXPENSIVE = int(os.getenv("MAX_CONCURRENT_EXPENSIVE", "4"))
+MAX_CONCURRENT_EXPENSIVE_PER_USER = int(os.getenv("MAX_CONCURRENT_EXPENSIVE_PER_USER", "1"))
+
+
+class RateLimitStore(ABC):
+    """Where limiter state lives. Swap in a shared backend (e.g. Redis) for multi-process deploys."""
+
+    @abstractmethod
+    def take(self, buckets):
+        """
+        buckets: list of (key, per_minute, burst). Takes one token from every
+        bucket only if all of them have one. Returns (allowed, retry_after_seconds).
+        """
+
+    @abstractmethod
+    def acquire(self, key: str, limit: int) -> bool:
+        """Take a concurrency slot for `key` if fewer than `limit` are in use."""
+
+    @abstractmethod
+    def release(self, key: str):
+        """Give back a slot taken with acquire()."""
+
+
+class InMemoryStore(RateLimitStore):
+    def __init__(self, max_buckets: int = 50000):
+        # key -> (tokens, last_refill), least recently used first. Past max_buckets the
+        # oldest bucket is evicted in O(1); it comes back full, which only ever errs lenient.
+        self._buckets = OrderedDict()
+        self._max_buckets = max_buckets
+        self._inflight = {}  # key -> count
+        self._lock = threading.Lock()
+
+    def take(self, buckets):
+        now = time.monotonic()
+        with self._lock:
+            refilled = []
+            retry_after = 0.0
+            for key, per_minute, burst in buckets:
+                rate = per_minute / 60.0
+                tokens, last = self._buckets.get(key, (burst, now))
+                tokens = min(burst, tokens + (now - last) * rate)
+                refilled.append((key, tokens))
+                if tokens < 1:
+                    retry_after = max(retry_after, (1 - tokens) / rate)
+            allowed = retry_after == 0.0
+            for key, tokens in refilled:
+                self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self._max_buckets:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def acquire(self, key, limit):
+        with self._lock:
+            n = self._inflight.get(key, 0)
+            if n >= limit:
+                return False
+            self._inflight[key] = n + 1
+            return True
+
+    def release(self, key):
+        with self._lock:
+            n = self._inflight.get(key, 0)
+            if n <= 1:
+                self._inflight.pop(key, None)
+            else:
+                self._inflight[key] = n - 1
+
+
+def client_id(scope) -> str:
+    """User id from the bearer token (signature checked, no DB hit), else the client IP."""
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            auth = value.decode("latin-1")
+            if auth.lower().startswith("bearer "):
+                user_id = user_id_from_token(auth[7:])
+                if user_id is not None:
+                    return f"user:{user_id}"
+            break
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "ip:unknown"
+
+
+class RateLimitMiddleware:
+    """
+    Per-user and per-route token buckets plus a per-user and a global
+    concurrency cap for expensive routes. Over a user limit -> 429, over
+    global capacity -> 503, both with Retry-After.
+    """
+
+    def __init__(self, app, store: RateLimitStore | None = None):
+        self.app = app
+        self.store = store or InMemoryStore()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        who = client_id(scope)
+
+        buckets = [(who, RATE_LIMIT_USER_PER_MINUTE, RATE_LIMIT_USER_BURST)]
+        if path in ROUTE_LIMITS:
+            per_minute, burst = ROUTE_LIMITS[path]
+            buckets.append((f"{who}:{path}", per_minute, burst))
+        allowed, retry_after = self.store.take(buckets)
+        if not allowed:
+            await _reject(send, 429, "Too many requests", retry_after)
+            return
+
+        if path not in EXPENSIVE_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        # the user's own share first, so a single client never holds every global slot
+        if not self.store.acquire(f"{who}:inflight", MAX_CONCURRENT_EXPENSIVE_PER_USER):
+            await _reject(send, 429, "Too many concurrent requests", 1)
+            return
+        try:
+            if not self.store.acquire("expensive", MAX_CONCURRENT_EXPENSIVE):
+                await _reject(send, 503, "Server busy, please retry shortly", 1)
+                return
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.store.release("expensive")
+        finally:
+            self.store.release(f"{who}:inflight")
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
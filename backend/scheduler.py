@@ -6,6 +6,7 @@ from backend import models
 import os
 from dotenv import load_dotenv
 from backend.notify import send_email, send_sms, send_whatsapp, log_reminder
+from backend.archive import run_archive_job
 
 load_dotenv()
 
@@ -51,4 +52,7 @@ def check_and_send_reminders():
 def start_scheduler():
     # For dev: run every 1 minute (fast feedback). For production, use interval=minutes=60 or cron.
     sched.add_job(check_and_send_reminders, "interval", minutes=1, id="reminder_job", replace_existing=True)
+    # move settled bills / old payments / reminder logs to the archive tables
+    archive_minutes = int(os.getenv("ARCHIVE_INTERVAL_MINUTES", "60"))
+    sched.add_job(run_archive_job, "interval", minutes=archive_minutes, id="archive_job", replace_existing=True)
     sched.start()
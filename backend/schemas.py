@@ -49,6 +49,7 @@ class BillOut(BillBase):
     id: int
     user_id: int
     is_paid: bool
+    archived: bool = False  # True when read from bills_archive (?include_archived=true)
 
     class Config:
         orm_mode = True
@@ -69,6 +70,7 @@ class PaymentOut(BaseModel):
     method: Optional[str]
     paid_on: datetime
     notes: Optional[str]
+    archived: bool = False  # True when read from payments_archive
 
     # Pydantic v2: allow reading attributes from ORM objects
     model_config = {
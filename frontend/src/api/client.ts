@@ -5,6 +5,8 @@ const API_BASE = import.meta.env.VITE_API_BASE ?? "http://127.0.0.1:8000";
 
 const api = axios.create({
   baseURL: API_BASE,
+  // send the API's read-after-write cookie back so reads right after a write see it
+  withCredentials: true,
   headers: {
     "Content-Type": "application/json",
   },
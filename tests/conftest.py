@@ -0,0 +1,52 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+import pytest
+
+# point the app at a throwaway SQLite file before backend.database is imported
+_tmpdir = tempfile.mkdtemp(prefix="smartdues-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir, 'test.db')}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import database, models
+
+
+@pytest.fixture
+def db():
+    database.Base.metadata.drop_all(bind=database.engine)
+    database.init_db()
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def user(db):
+    u = models.User(email="user@example.com", password_hash="x")
+    db.add(u)
+    db.commit()
+    return u
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    from fastapi.testclient import TestClient
+    from backend import main, ratelimit, scheduler
+
+    if scheduler.sched.running:
+        scheduler.sched.shutdown(wait=False)
+    # main.app builds one limiter for the whole session; rate limits are tested
+    # directly against RateLimitMiddleware in test_ratelimit.py
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", False)
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def auth_headers(client):
+    client.post("/auth/signup", json={"email": "client@example.com", "password": "secret"})
+    token = client.post("/auth/login", data={"username": "client@example.com", "password": "secret"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
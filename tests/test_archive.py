@@ -0,0 +1,83 @@
+# tests/test_archive.py
+from datetime import date, datetime, timedelta
+
+from backend import archive, crud, models
+
+OLD = datetime(2020, 1, 1)
+CUTOFF = date.today() - timedelta(days=180)
+
+
+def add_reminder(db, user, sent_at=OLD):
+    rl = models.ReminderLog(user_id=user.id, bill_id=None, reminder_sent_at=sent_at, channel="sms")
+    db.add(rl)
+    db.commit()
+    return rl
+
+
+def test_archive_insert_archive_again(db, user):
+    add_reminder(db, user)
+    assert archive.archive_old_rows(db, CUTOFF)["reminders"] == 1
+
+    add_reminder(db, user)
+    assert archive.archive_old_rows(db, CUTOFF)["reminders"] == 1
+
+    rows = db.query(models.ReminderLogArchive).order_by(models.ReminderLogArchive.archive_id).all()
+    assert len(rows) == 2
+    # hot ids are never reused, so the archived source ids stay distinct
+    assert rows[0].source_id != rows[1].source_id
+
+
+def test_archive_tolerates_reused_source_id(db, user):
+    # a pre-AUTOINCREMENT SQLite table can hand out an id that is already archived
+    rl_id = add_reminder(db, user).id
+    db.add(models.ReminderLogArchive(source_id=rl_id, user_id=user.id, reminder_sent_at=OLD, channel="sms"))
+    db.commit()
+
+    assert archive.archive_old_rows(db, CUTOFF)["reminders"] == 1
+    assert db.query(models.ReminderLogArchive).filter_by(source_id=rl_id).count() == 2
+
+
+def test_include_archived_reads_source_ids(db, user):
+    bill = models.Bill(user_id=user.id, title="rent", amount=10, due_date=date(2020, 1, 1), is_paid=True)
+    db.add(bill)
+    db.commit()
+    bill_id = bill.id
+    crud.create_payment(db, user.id, {"bill_id": bill_id, "amount": 10, "method": "manual"})
+    db.query(models.Payment).update({models.Payment.paid_on: OLD})
+    db.commit()
+
+    counts = archive.archive_old_rows(db, CUTOFF)
+    assert counts["payments"] == 1 and counts["bills"] == 1
+
+    assert crud.get_bills_for_user(db, user.id) == []
+    rows = crud.get_bills_for_user(db, user.id, include_archived=True)
+    assert [(r.id, r.archived) for r in rows] == [(bill_id, True)]
+    payments = crud.get_payments_for_user(db, user.id, include_archived=True)
+    assert [(p.bill_id, p.archived) for p in payments] == [(bill_id, True)]
+
+
+def test_export_includes_every_archived_row_in_month(client, auth_headers, db):
+    user = db.query(models.User).filter_by(email="client@example.com").one()
+    start = datetime(2020, 1, 1)
+    for h in range(1200):  # hourly, 2020-01-01 .. 2020-02-19
+        db.add(models.Payment(user_id=user.id, amount=1, method="manual", paid_on=start + timedelta(hours=h)))
+    db.commit()
+    assert archive.archive_old_rows(db, CUTOFF, batch_size=500, max_batches=10)["payments"] == 1200
+
+    r = client.get("/payments/export?month=2020-01&include_archived=true", headers=auth_headers)
+    lines = r.text.strip().splitlines()
+    assert len(lines) - 1 == 31 * 24
+    assert lines[1].endswith("2020-01-01T00:00:00")
+
+
+def test_include_archived_lists_active_bills_first(db, user):
+    for i in range(120):
+        db.add(models.Bill(user_id=user.id, title=f"old {i}", amount=1, due_date=date(2020, 1, 1), is_paid=True))
+    db.add(models.Bill(user_id=user.id, title="current", amount=1, due_date=date.today()))
+    db.commit()
+    assert archive.archive_old_rows(db, CUTOFF)["bills"] == 120
+
+    rows = crud.get_bills_for_user(db, user.id, include_archived=True)
+    assert len(rows) == 100
+    assert (rows[0].title, rows[0].archived) == ("current", False)
+    assert all(r.archived for r in rows[1:])
@@ -0,0 +1,118 @@
+# tests/test_database.py
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from sqlalchemy import event, text
+from sqlalchemy.pool import QueuePool
+from starlette.requests import Request
+
+from backend import database, models
+
+
+def make_request(token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "headers": headers})
+
+
+def test_sqlite_read_engine_is_pooled_and_read_only(db):
+    assert database.read_engine is not database.engine
+    assert isinstance(database.read_engine.pool, QueuePool)
+    with database.read_engine.connect() as conn:
+        try:
+            conn.execute(text("INSERT INTO users (email) VALUES ('ro@example.com')"))
+        except Exception as e:
+            assert "readonly" in str(e).lower()
+        else:
+            raise AssertionError("read engine accepted a write")
+
+
+def test_concurrent_reads(db, user):
+    for i in range(50):
+        db.add(models.Bill(user_id=user.id, title=f"bill {i}", amount=10, due_date=date(2026, 1, 1)))
+    db.commit()
+    user_id = user.id
+
+    def read(_):
+        s = database.ReadSessionLocal()
+        try:
+            for _ in range(20):
+                assert s.query(models.Bill).filter(models.Bill.user_id == user_id).count() == 50
+                s.rollback()
+        finally:
+            s.close()
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(read, range(64)))
+
+
+def test_reads_pinned_to_primary_after_write(client, auth_headers):
+    token = auth_headers["Authorization"].split()[1]
+    user_id = database.request_user_id(make_request(token))
+    database._last_write.clear()
+    assert database.read_session_factory(make_request(token)) is database.ReadSessionLocal
+
+    client.post("/bills", json={"title": "rent", "amount": 10, "due_date": "2026-01-01"}, headers=auth_headers)
+    assert user_id in database._last_write
+    assert database.read_session_factory(make_request(token)) is database.SessionLocal
+    assert not any(isinstance(k, str) for k in database._last_write)
+
+
+def test_signup_pins_new_user(client):
+    database._last_write.clear()
+    user_id = client.post("/auth/signup", json={"email": "new@example.com", "password": "pw"}).json()["id"]
+    assert user_id in database._last_write
+
+
+def test_invalid_read_consistency_is_rejected():
+    env = {**os.environ, "READ_CONSISTENCY": "sesion"}
+    r = subprocess.run([sys.executable, "-c", "import backend.database"], env=env,
+                       cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       capture_output=True, text=True)
+    assert r.returncode != 0
+    assert "READ_CONSISTENCY" in r.stderr
+
+
+def test_write_cookie_pins_reads_across_processes(client, auth_headers):
+    r = client.post("/bills", json={"title": "rent", "amount": 10, "due_date": "2026-01-01"}, headers=auth_headers)
+    assert database.WRITE_COOKIE in r.cookies
+
+    # another worker has no in-process record of the write; only the cookie tells it
+    database._last_write.clear()
+    cookie = f"{database.WRITE_COOKIE}={r.cookies[database.WRITE_COOKIE]}"
+    request = Request({"type": "http", "headers": [(b"cookie", cookie.encode())]})
+    assert database.read_session_factory(request) is database.SessionLocal
+    assert database.read_session_factory(make_request()) is database.ReadSessionLocal
+
+
+def test_stale_write_cookie_is_ignored():
+    stale = f"{database.WRITE_COOKIE}={time.time() - database.READ_AFTER_WRITE_SECONDS - 1:.3f}"
+    request = Request({"type": "http", "headers": [(b"cookie", stale.encode())]})
+    assert database.read_session_factory(request) is database.ReadSessionLocal
+
+
+def test_write_route_holds_one_connection(client, auth_headers):
+    held, peak = [0], [0]
+
+    def checkout(*_):
+        held[0] += 1
+        peak[0] = max(peak[0], held[0])
+
+    def checkin(*_):
+        held[0] -= 1
+
+    engines = {database.engine, database.read_engine}
+    for e in engines:
+        event.listen(e, "checkout", checkout)
+        event.listen(e, "checkin", checkin)
+    try:
+        r = client.post("/bills", json={"title": "rent", "amount": 10, "due_date": "2026-01-01"}, headers=auth_headers)
+    finally:
+        for e in engines:
+            event.remove(e, "checkout", checkout)
+            event.remove(e, "checkin", checkin)
+    assert r.status_code == 200
+    assert peak[0] == 1
@@ -0,0 +1,37 @@
+# tests/test_main.py
+import json
+
+import pytest
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("application/x-ndjson", True),
+    ("application/x-ndjson, application/json", True),
+    ("application/json, application/x-ndjson;q=0.5", False),
+    ("application/x-ndjson;q=0", False),
+    ("application/x-ndjson;q=0.9, */*;q=0.1", True),
+    ("*/*", False),
+    ("application/*", False),
+    ("", False),
+])
+def test_ndjson_negotiation(client, auth_headers, accept, expected):
+    client.post("/bills", json={"title": "rent", "amount": 10, "due_date": "2026-01-01"}, headers=auth_headers)
+    r = client.get("/bills", headers={**auth_headers, "Accept": accept})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson") is expected
+
+
+def test_ndjson_and_json_return_the_same_page(client, auth_headers):
+    for i in range(120):
+        client.post("/bills", json={"title": f"bill {i}", "amount": 1, "due_date": "2026-01-01"}, headers=auth_headers)
+
+    for query in ["", "?skip=100", "?skip=10&limit=25", "?include_archived=true"]:
+        as_json = client.get(f"/bills{query}", headers=auth_headers).json()
+        r = client.get(f"/bills{query}", headers={**auth_headers, "Accept": "application/x-ndjson"})
+        as_ndjson = [json.loads(line) for line in r.text.splitlines()]
+        assert as_ndjson == as_json
+    assert len(client.get("/bills", headers=auth_headers).json()) == 100
+
+
+def test_page_size_is_capped(client, auth_headers):
+    assert client.get("/bills?limit=5000", headers=auth_headers).status_code == 422
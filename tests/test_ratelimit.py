@@ -0,0 +1,72 @@
+# tests/test_ratelimit.py
+import asyncio
+
+import pytest
+
+from backend import ratelimit
+from backend.ratelimit import InMemoryStore, RateLimitMiddleware, RateLimitStore
+
+
+def test_incomplete_store_fails_at_construction():
+    class Partial(RateLimitStore):
+        def take(self, buckets):
+            return True, 0.0
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_take_spends_nothing_when_any_bucket_is_empty():
+    store = InMemoryStore()
+    user, route = ("u", 60, 5), ("u:/dashboard", 60, 1)
+    assert store.take([user, route]) == (True, 0.0)
+
+    allowed, retry_after = store.take([user, route])
+    assert not allowed and retry_after > 0
+    # the user bucket kept its tokens: 4 left after the one successful take
+    assert store._buckets["u"][0] == pytest.approx(4, abs=0.1)
+
+
+def test_one_user_cannot_hold_every_expensive_slot(monkeypatch):
+    monkeypatch.setattr(ratelimit, "MAX_CONCURRENT_EXPENSIVE", 4)
+    monkeypatch.setattr(ratelimit, "MAX_CONCURRENT_EXPENSIVE_PER_USER", 1)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        mw = RateLimitMiddleware(app)
+
+        async def call(ip):
+            statuses = []
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+
+            scope = {"type": "http", "method": "GET", "path": "/dashboard", "headers": [], "client": (ip, 1)}
+            await mw(scope, None, send)
+            return statuses[0]
+
+        greedy = [asyncio.create_task(call("10.0.0.1")) for _ in range(5)]
+        other = asyncio.create_task(call("10.0.0.2"))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*greedy), await other
+
+    greedy, other = asyncio.run(run())
+    assert sorted(greedy) == [200, 429, 429, 429, 429]
+    assert other == 200
+
+
+def test_store_evicts_least_recently_used_bucket():
+    store = InMemoryStore(max_buckets=3)
+    for key in ["a", "b", "c"]:
+        store.take([(key, 60, 5)])
+    store.take([("a", 60, 5)])  # "a" is now the most recently used
+    store.take([("d", 60, 5)])
+    assert list(store._buckets) == ["c", "a", "d"]